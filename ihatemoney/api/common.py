@@ -1,6 +1,6 @@
 from functools import wraps
 
-from flask import current_app, request
+from flask import current_app, g, request
 from flask_restful import Resource, abort
 from werkzeug.security import check_password_hash
 from wtforms.fields import BooleanField
@@ -24,9 +24,11 @@ def need_auth(f):
 
         # Use Basic Auth
         if auth and project_id and auth.username.lower() == project_id:
-            project = Project.query.get(auth.username.lower())
+            project = Project.query.get_with_members(project_id)
             if project and check_password_hash(project.password, auth.password):
                 # The whole project object will be passed instead of project_id
+                # and kept for the rest of the request
+                g.project = project
                 kwargs.pop("project_id")
                 return f(*args, project=project, **kwargs)
         else:
@@ -41,8 +43,11 @@ def need_auth(f):
                 auth_token, token_type="auth", project_id=project_id
             )
             if auth_token and project_id:
+                # The project is already in the session identity map, since it
+                # was needed to verify the token
                 project = Project.query.get(project_id)
                 if project:
+                    g.project = project
                     kwargs.pop("project_id")
                     return f(*args, project=project, **kwargs)
         abort(401)
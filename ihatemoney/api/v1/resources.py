@@ -1,4 +1,4 @@
-from flask import Blueprint
+from flask import Blueprint, request
 from flask_cors import CORS
 from flask_restful import Api
 
@@ -13,11 +13,36 @@ from ihatemoney.api.common import (
     ProjectStatsHandler,
     TokenHandler,
 )
+from ihatemoney.utils import limiter
 
 api = Blueprint("api", __name__, url_prefix="/api")
 CORS(api)
 restful_api = Api(api)
 
+
+def is_failed_authentication(response):
+    """Whether the request was sent with credentials that were rejected"""
+    return response.status_code == 401 and "Authorization" in request.headers
+
+
+# Only failed authentications count towards the limit, to slow down password
+# guessing. Once it is reached, every API request from the same IP address is
+# rejected with a 429 until the window is over (see docs/api.md).
+limiter.shared_limit(
+    "10/minute", scope="api_auth", deduct_when=is_failed_authentication
+)(api)
+
+
+@api.after_request
+def make_conditional(response):
+    """Let clients revalidate the responses they already have
+    (e.g. the mobile applications polling bills) and get a 304"""
+    if request.method == "GET" and response.status_code == 200:
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+
 restful_api.add_resource(CurrenciesHandler, "/currencies")
 restful_api.add_resource(ProjectsHandler, "/projects")
 restful_api.add_resource(ProjectHandler, "/projects/<string:project_id>")
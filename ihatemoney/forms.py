@@ -3,7 +3,6 @@ import decimal
 from re import match
 from types import SimpleNamespace
 
-import email_validator
 from flask import request
 from flask_babel import lazy_gettext as _
 from flask_wtf.file import FileAllowed, FileField, FileRequired
@@ -41,7 +40,7 @@ from wtforms.validators import (
 )
 
 from ihatemoney.currency_convertor import CurrencyConverter
-from ihatemoney.models import Bill, BillType, LoggingMode, Person, Project
+from ihatemoney.models import Bill, BillType, LoggingMode, Person, Project, db
 from ihatemoney.utils import (
     em_surround,
     eval_arithmetic_expression,
@@ -81,10 +80,12 @@ def get_billform_for(project, set_default=True, **kwargs):
         )
     ]
 
+    # Only (id, name) pairs are needed: members are already loaded along with
+    # the project, so build the choices from them instead of querying again.
     active_members = [(m.id, m.name) for m in project.active_members]
 
     form.payed_for.choices = form.payer.choices = active_members
-    form.payed_for.default = [m.id for m in project.active_members]
+    form.payed_for.default = [member_id for member_id, name in active_members]
 
     if set_default and request.method == "GET":
         form.set_default()
@@ -266,7 +267,8 @@ class ProjectForm(EditProjectForm):
 
     def validate_id(self, field):
         self.id.data = slugify(field.data)
-        if (self.id.data == "dashboard") or Project.query.get(self.id.data):
+        project_exists = Project.query.filter(Project.id == self.id.data).exists()
+        if (self.id.data == "dashboard") or db.session.query(project_exists).scalar():
             message = _(
                 'A project with this identifier ("%(project)s") already exists. '
                 "Please choose a new identifier",
@@ -409,7 +411,7 @@ class BillForm(FlaskForm):
         self.external_link.data = bill.external_link
         self.original_currency.data = bill.original_currency
         self.date.data = bill.date
-        self.payed_for.data = [int(ower.id) for ower in bill.owers]
+        self.payed_for.data = [ower.id for ower in bill.owers]
 
         self.original_currency.label = Label("original_currency", _("Currency"))
         self.original_currency.description = _(
@@ -470,15 +472,14 @@ class MemberForm(FlaskForm):
     def validate_name(self, field):
         if field.data == self.name.default:
             raise ValidationError(_("The participant name is invalid"))
-        if (
-            not self.edit
-            and Person.query.filter(
+        if not self.edit:
+            same_name = Person.query.filter(
                 Person.name == field.data,
                 Person.project == self.project,
                 Person.activated,
-            ).all()
-        ):  # NOQA
-            raise ValidationError(_("This project already have this participant"))
+            )
+            if db.session.query(same_name.exists()).scalar():
+                raise ValidationError(_("This project already have this participant"))
 
     def save(self, project, person):
         # if the user is already bound to the project, just reactivate him
@@ -498,9 +499,15 @@ class InviteForm(FlaskForm):
     submit = SubmitField(_("Send the invitations"))
 
     def validate_emails(self, field):
-        for email in [email.strip() for email in self.emails.data.split(",")]:
+        # Like the WTForms Email validator, only import email_validator when
+        # it is needed: building its tables takes a noticeable time.
+        import email_validator
+
+        for email in (email.strip() for email in self.emails.data.split(",")):
             try:
-                email_validator.validate_email(email)
+                # Only check the syntax, as the WTForms Email validator does:
+                # checking deliverability makes a DNS query per address
+                email_validator.validate_email(email, check_deliverability=False)
             except email_validator.EmailNotValidError:
                 raise ValidationError(
                     _("The email %(email)s is not valid", email=em_surround(email))
@@ -1,6 +1,6 @@
-from sqlalchemy_continuum import Operation, parent_class
+from sqlalchemy_continuum import Operation, parent_class, transaction_class
 
-from ihatemoney.models import BillVersion, Person, PersonVersion, ProjectVersion
+from ihatemoney.models import BillVersion, Person, PersonVersion, ProjectVersion, db
 
 
 def get_history_queries(project):
@@ -163,3 +163,20 @@ def purge_history(project):
     """
     for query in get_history_queries(project):
         query.delete(synchronize_session="fetch")
+
+
+def purge_ip_addresses(project):
+    """
+    Erase the IP addresses recorded in the history of a project, with a single
+    UPDATE statement.
+    You must commit the purge after calling this function.
+    """
+    person_changes, project_changes, bill_changes = get_history_queries(project)
+    transaction_ids = person_changes.with_entities(PersonVersion.transaction_id).union(
+        project_changes.with_entities(ProjectVersion.transaction_id),
+        bill_changes.with_entities(BillVersion.transaction_id),
+    )
+    Transaction = transaction_class(BillVersion)
+    db.session.query(Transaction).filter(Transaction.id.in_(transaction_ids)).update(
+        {Transaction.remote_addr: None}, synchronize_session=False
+    )
@@ -0,0 +1,41 @@
+"""index foreign keys
+
+Revision ID: e782dd493cdc
+Revises: 7a9b38559992
+Create Date: 2026-10-17 10:12:41.128403
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = "e782dd493cdc"
+down_revision = "7a9b38559992"
+
+from alembic import op
+
+# (table, column, has a foreign key constraint)
+INDEXES = [
+    ("person", "project_id", True),
+    ("person_version", "project_id", False),
+    ("bill", "payer_id", True),
+    ("bill_version", "payer_id", False),
+    ("billowers", "person_id", True),
+    ("billowers_version", "person_id", False),
+]
+
+
+def indexes_to_create():
+    # InnoDB already indexes the columns of foreign keys, do not duplicate them
+    dialect = op.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        return [(table, column) for table, column, fk in INDEXES if not fk]
+    return [(table, column) for table, column, fk in INDEXES]
+
+
+def upgrade():
+    for table, column in indexes_to_create():
+        op.create_index(op.f(f"ix_{table}_{column}"), table, [column], unique=False)
+
+
+def downgrade():
+    for table, column in indexes_to_create():
+        op.drop_index(op.f(f"ix_{table}_{column}"), table_name=table)
@@ -63,12 +63,23 @@ class BillType(Enum):
 
 db = SQLAlchemy()
 
+# Bills are listed in bulk: anything they need must be loaded by the query
+# listing them. Accessing a relationship that would require one more query
+# per bill raises an error instead of silently slowing down the page. Payers
+# and owers can still be found in the session without any query.
+no_lazy_sql = orm.raiseload("*", sql_only=True)
+
 
 class Project(db.Model):
     class ProjectQuery(BaseQuery):
         def get_by_name(self, name):
             return Project.query.filter(Project.name == name).one()
 
+        def get_with_members(self, id):
+            """Same as get(), but also loads the project members in the same
+            query, as almost every project view needs them"""
+            return self.options(orm.joinedload(Project.members)).get(id)
+
     # Direct SQLAlchemy-Continuum to track changes to this model
     __versioned__ = {}
 
@@ -125,21 +136,29 @@ class Project(db.Model):
 
         balance       spent        paid
         """
+        # Balances only change when something is written to the database, so
+        # they are computed once per session and reused until the next write
+        # (see invalidate_balances).
+        balances = db.session.info.setdefault("balances", {})
+        if self.id not in balances:
+            balances[self.id] = self._compute_full_balance()
+        return balances[self.id]
+
+    def _compute_full_balance(self):
         balances, should_pay, should_receive = (defaultdict(int) for time in (1, 2, 3))
-        for bill in self.get_bills_unordered().all():
-            total_weight = sum(ower.weight for ower in bill.owers)
 
-            if bill.bill_type == BillType.EXPENSE:
-                should_receive[bill.payer.id] += bill.converted_amount
-                for ower in bill.owers:
-                    should_pay[ower.id] += (
-                        ower.weight * bill.converted_amount / total_weight
-                    )
+        # Sums are computed by the database, grouped by member, so that the
+        # number of queries does not depend on the number of bills.
+        params = {"project_id": self.id}
+        for payer_id, amount in db.session.execute(paid_by_payer, params):
+            should_receive[payer_id] += amount
 
-            if bill.bill_type == BillType.REIMBURSEMENT:
-                should_receive[bill.payer.id] += bill.converted_amount
-                for ower in bill.owers:
-                    should_receive[ower.id] -= bill.converted_amount
+        owed_by_ower = db.session.execute(owed_by_bill_type_and_ower, params)
+        for ower_id, bill_type, share, amount in owed_by_ower:
+            if bill_type == BillType.EXPENSE:
+                should_pay[ower_id] += share
+            if bill_type == BillType.REIMBURSEMENT:
+                should_receive[ower_id] -= amount
 
         for person in self.members:
             balance = should_receive[person.id] - should_pay[person.id]
@@ -226,7 +245,7 @@ class Project(db.Model):
 
     def has_bills(self):
         """return if the project do have bills or not"""
-        return self.get_bills_unordered().count() > 0
+        return db.session.query(self.get_bills_unordered().exists()).scalar()
 
     def has_multiple_currencies(self):
         """Returns True if multiple currencies are used"""
@@ -240,16 +259,14 @@ class Project(db.Model):
 
     def get_bills_unordered(self):
         """Base query for bill list"""
-        # The subqueryload option allows to pre-load data from the
-        # billowers table, which makes access to this data much faster.
-        # Without this option, any access to bill.owers would trigger a
-        # new SQL query, ruining overall performance.
+        # The selectinload option allows to pre-load data from the
+        # billowers table with a single extra "IN" query, which makes access
+        # to this data much faster. Without this option, any access to
+        # bill.owers would trigger a new SQL query, ruining overall performance.
         return (
-            Bill.query.options(orm.subqueryload(Bill.owers))
-            .join(Person, Project)
-            .filter(Bill.payer_id == Person.id)
-            .filter(Person.project_id == Project.id)
-            .filter(Project.id == self.id)
+            Bill.query.options(orm.selectinload(Bill.owers), no_lazy_sql)
+            .join(Person, Bill.payer_id == Person.id)
+            .filter(Person.project_id == self.id)
         )
 
     def get_bills(self):
@@ -273,11 +290,12 @@ class Project(db.Model):
         """
         return (
             db.session.query(func.sum(Person.weight), Bill)
-            .options(orm.subqueryload(Bill.owers))
+            .options(
+                orm.selectinload(Bill.owers), orm.selectinload(Bill.payer), no_lazy_sql
+            )
             .select_from(Person)
-            .join(billowers, Bill, Project)
-            .filter(Person.project_id == Project.id)
-            .filter(Project.id == self.id)
+            .join(billowers, Bill)
+            .filter(Person.project_id == self.id)
             .group_by(Bill.id)
         )
 
@@ -332,8 +350,12 @@ class Project(db.Model):
     def get_pretty_bills(self, export_format="json"):
         """Return a list of project's bills with pretty formatting"""
         bills = self.get_bills()
+        # Payers are looked up among the already loaded members, rather than
+        # with two queries per bill
+        members = {member.id: member for member in self.members}
         pretty_bills = []
         for bill in bills:
+            payer = members[bill.payer_id]
             if export_format == "json":
                 owers = [ower.name for ower in bill.owers]
             else:
@@ -346,8 +368,8 @@ class Project(db.Model):
                     "amount": round(bill.amount, 2),
                     "currency": bill.original_currency,
                     "date": str(bill.date),
-                    "payer_name": Person.query.get(bill.payer_id).name,
-                    "payer_weight": Person.query.get(bill.payer_id).weight,
+                    "payer_name": payer.name,
+                    "payer_weight": payer.weight,
                     "owers": owers,
                 }
             )
@@ -402,6 +424,10 @@ class Project(db.Model):
         # Import bills not already in the project
         project_bills = self.get_pretty_bills()
         id_dict = {m.name: m.id for m in self.members}
+        # Owers are taken from the loaded members rather than queried for each
+        # bill, which would also flush the previous bill every time: all the
+        # bills are then inserted by a single flush.
+        members = self.members
         for b in bills:
             same = False
             for p_b in project_bills:
@@ -417,7 +443,7 @@ class Project(db.Model):
                         bill_type=b["bill_type"],
                         external_link="",
                         original_currency=b["currency"],
-                        owers=Person.query.get_by_names(b["owers"], self),
+                        owers=[m for m in members if m.name in b["owers"]],
                         payer_id=id_dict[b["payer_name"]],
                         project_default_currency=self.default_currency,
                         what=b["what"],
@@ -579,21 +605,15 @@ class Person(db.Model):
                 .one_or_none()
             )
 
-        def get_by_names(self, names, project):
-            return (
-                Person.query.filter(Person.name.in_(names))
-                .filter(Person.project_id == project.id)
-                .all()
-            )
-
         def get(self, id, project=None):
             if not project:
                 project = g.project
-            return (
-                Person.query.filter(Person.id == id)
-                .filter(Person.project_id == project.id)
-                .one_or_none()
-            )
+            # The members of the project are usually loaded already: look the
+            # person up by primary key, which is served by the identity map.
+            person = super().get(id)
+            if person is None or person.project_id != project.id:
+                return None
+            return person
 
         def get_by_ids(self, ids, project=None):
             if not project:
@@ -612,7 +632,7 @@ class Person(db.Model):
     __table_args__ = {"sqlite_autoincrement": True}
 
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.String(64), db.ForeignKey("project.id"))
+    project_id = db.Column(db.String(64), db.ForeignKey("project.id"), index=True)
     bills = db.relationship("Bill", backref="payer")
 
     name = db.Column(db.UnicodeText)
@@ -630,12 +650,13 @@ class Person(db.Model):
 
     def has_bills(self):
         """return if the participant do have bills or not"""
-        bills_as_ower_number = (
+        as_payer = Bill.query.filter(Bill.payer_id == self.id).exists()
+        as_ower = (
             db.session.query(billowers)
             .filter(billowers.columns.get("person_id") == self.id)
-            .count()
+            .exists()
         )
-        return bills_as_ower_number != 0 or len(self.bills) != 0
+        return db.session.query(sqlalchemy.or_(as_payer, as_ower)).scalar()
 
     def __str__(self):
         return self.name
@@ -648,7 +669,13 @@ class Person(db.Model):
 billowers = db.Table(
     "billowers",
     db.Column("bill_id", db.Integer, db.ForeignKey("bill.id"), primary_key=True),
-    db.Column("person_id", db.Integer, db.ForeignKey("person.id"), primary_key=True),
+    db.Column(
+        "person_id",
+        db.Integer,
+        db.ForeignKey("person.id"),
+        primary_key=True,
+        index=True,
+    ),
     sqlite_autoincrement=True,
 )
 
@@ -656,12 +683,14 @@ billowers = db.Table(
 class Bill(db.Model):
     class BillQuery(BaseQuery):
         def get(self, project, id):
+            # Callers display, replace or delete the owers of the bill (the
+            # deletion of billowers rows is versioned too), so load them along
+            # with the bill. The payer comes from the join on the project.
             try:
                 return (
-                    self.join(Person, Project)
-                    .filter(Bill.payer_id == Person.id)
-                    .filter(Person.project_id == Project.id)
-                    .filter(Project.id == project.id)
+                    self.join(Person, Bill.payer_id == Person.id)
+                    .options(orm.contains_eager(Bill.payer), orm.joinedload(Bill.owers))
+                    .filter(Person.project_id == project.id)
                     .filter(Bill.id == id)
                     .one()
                 )
@@ -683,7 +712,7 @@ class Bill(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    payer_id = db.Column(db.Integer, db.ForeignKey("person.id"))
+    payer_id = db.Column(db.Integer, db.ForeignKey("person.id"), index=True)
     owers = db.relationship(Person, secondary=billowers)
 
     amount = db.Column(db.Float)
@@ -742,17 +771,12 @@ class Bill(db.Model):
         }
 
     def pay_each_default(self, amount):
-        """Compute what each share has to pay. Warning: this is slow, if you need
-        to compute this for many bills, do it differently (see
-        balance_full function)
+        """Compute what each share has to pay, from the owers collection.
+        If you need to compute this for many bills, make sure owers are
+        eagerly loaded, or do it in the database (see full_balance)
         """
         if self.owers:
-            weights = (
-                db.session.query(func.sum(Person.weight))
-                .join(billowers, Bill)
-                .filter(Bill.id == self.id)
-            ).scalar()
-            return amount / weights
+            return amount / sum(ower.weight for ower in self.owers)
         else:
             return 0
 
@@ -760,16 +784,21 @@ class Bill(db.Model):
         return self.what
 
     def pay_each(self):
-        """Warning: this is slow, if you need to compute this for many bills, do
-        it differently (see balance_full function)
-        """
+        """Compute what each share has to pay, in the project currency"""
         return self.pay_each_default(self.converted_amount)
 
     def __repr__(self):
-        return (
-            f"<Bill of {self.amount} from {self.payer} for "
-            f"{', '.join([o.name for o in self.owers])}>"
-        )
+        # Do not load the payer or the owers only to display the bill
+        unloaded = sqlalchemy.inspect(self).unloaded
+        if "payer" in unloaded:
+            payer = f"#{self.payer_id}"
+        else:
+            payer = self.payer
+        if "owers" in unloaded:
+            owers = "..."
+        else:
+            owers = ", ".join([o.name for o in self.owers])
+        return f"<Bill of {self.amount} from {payer} for {owers}>"
 
 
 class Archive(db.Model):
@@ -789,6 +818,55 @@ class Archive(db.Model):
         return "<Archive>"
 
 
+# Statements used to compute the project balances (see Project.full_balance).
+# They are built only once: the project id is given when executing them.
+paid_by_payer = (
+    sqlalchemy.select(Bill.payer_id, func.sum(Bill.converted_amount))
+    .join(Person, Bill.payer_id == Person.id)
+    .where(Person.project_id == sqlalchemy.bindparam("project_id"))
+    .group_by(Bill.payer_id)
+)
+bill_weights = (
+    sqlalchemy.select(
+        billowers.c.bill_id, func.sum(Person.weight).label("total_weight")
+    )
+    .join(Person, billowers.c.person_id == Person.id)
+    .where(Person.project_id == sqlalchemy.bindparam("project_id"))
+    .group_by(billowers.c.bill_id)
+    .subquery()
+)
+owed_by_bill_type_and_ower = (
+    sqlalchemy.select(
+        billowers.c.person_id,
+        Bill.bill_type,
+        func.sum(Person.weight * Bill.converted_amount / bill_weights.c.total_weight),
+        func.sum(Bill.converted_amount),
+    )
+    .select_from(billowers)
+    .join(Person, billowers.c.person_id == Person.id)
+    .join(Bill, billowers.c.bill_id == Bill.id)
+    .join(bill_weights, bill_weights.c.bill_id == Bill.id)
+    .where(Person.project_id == sqlalchemy.bindparam("project_id"))
+    .group_by(billowers.c.person_id, Bill.bill_type)
+)
+
+
+@sqlalchemy.event.listens_for(db.session, "after_flush")
+@sqlalchemy.event.listens_for(db.session, "after_soft_rollback")
+def invalidate_balances(session, *args):
+    """Any write (or rollback) may change the balances: invalidate the
+    ones computed in this session"""
+    session.info.pop("balances", None)
+
+
+@sqlalchemy.event.listens_for(db.session, "do_orm_execute")
+def invalidate_balances_on_execute(orm_execute_state):
+    """Writes that do not go through a flush (bulk updates or deletes,
+    statements executed directly) also invalidate the balances"""
+    if not orm_execute_state.is_select:
+        invalidate_balances(orm_execute_state.session)
+
+
 sqlalchemy.orm.configure_mappers()
 
 PersonVersion = version_class(Person)
@@ -36,9 +36,9 @@ def setup_database(app):
 
     def _pre_alembic_db():
         """Checks if we are migrating from a pre-alembic ihatemoney"""
-        con = db.engine.connect()
-        tables_exist = db.engine.dialect.has_table(con, "project")
-        alembic_setup = db.engine.dialect.has_table(con, "alembic_version")
+        with db.engine.connect() as con:
+            tables_exist = db.engine.dialect.has_table(con, "project")
+            alembic_setup = db.engine.dialect.has_table(con, "alembic_version")
         return tables_exist and not alembic_setup
 
     sqlalchemy_url = app.config.get("SQLALCHEMY_DATABASE_URI")
@@ -205,11 +205,12 @@ def create_app(
 
     def get_locale():
         # get the lang from the session if defined, fallback on the browser "accept
-        # languages" header.
-        lang = session.get(
-            "lang",
-            request.accept_languages.best_match(app.config["SUPPORTED_LANGUAGES"]),
-        )
+        # languages" header (only parsed when needed).
+        lang = session.get("lang")
+        if lang is None:
+            lang = request.accept_languages.best_match(
+                app.config["SUPPORTED_LANGUAGES"]
+            )
         setattr(g, "lang", lang)
         return lang
 
@@ -41,11 +41,9 @@ class TestAPI(IhatemoneyTestCase):
 
     def get_auth(self, username, password=None):
         password = password or username
-        base64string = (
-            base64.encodebytes(f"{username}:{password}".encode("utf-8"))  # noqa: E231
-            .decode("utf-8")
-            .replace("\n", "")
-        )
+        base64string = base64.b64encode(
+            f"{username}:{password}".encode("utf-8")  # noqa: E231
+        ).decode("utf-8")
         return {"Authorization": f"Basic {base64string}"}
 
     def test_cors_requests(self):
@@ -1074,3 +1072,66 @@ class TestAPI(IhatemoneyTestCase):
         # Bill type should now be "Expense"
         got = json.loads(req.data.decode("utf-8"))
         assert got["bill_type"] == "Expense"
+
+    def test_etag(self):
+        self.api_create("raclette")
+        self.api_add_member("raclette", "zorglub")
+
+        req = self.client.get(
+            "/api/projects/raclette/bills", headers=self.get_auth("raclette")
+        )
+        self.assertStatus(200, req)
+        etag = req.headers["ETag"]
+
+        # Unchanged bills are not sent again
+        req = self.client.get(
+            "/api/projects/raclette/bills",
+            headers={**self.get_auth("raclette"), "If-None-Match": etag},
+        )
+        self.assertStatus(304, req)
+        assert req.data == b""
+
+        self.client.post(
+            "/api/projects/raclette/bills",
+            data={
+                "date": "2011-08-10",
+                "what": "fromage",
+                "payer": "1",
+                "payed_for": ["1"],
+                "amount": "50",
+            },
+            headers=self.get_auth("raclette"),
+        )
+        req = self.client.get(
+            "/api/projects/raclette/bills",
+            headers={**self.get_auth("raclette"), "If-None-Match": etag},
+        )
+        self.assertStatus(200, req)
+        assert req.headers["ETag"] != etag
+
+    def test_auth_failure_limit(self):
+        self.api_create("raclette")
+
+        # Successful requests are not limited
+        for _ in range(11):
+            req = self.client.get(
+                "/api/projects/raclette", headers=self.get_auth("raclette")
+            )
+            self.assertStatus(200, req)
+
+        # Neither are requests without credentials
+        for _ in range(11):
+            req = self.client.get("/api/projects/raclette")
+            self.assertStatus(401, req)
+
+        # Failed authentications are
+        wrong_auth = self.get_auth("raclette", "wrong")
+        for _ in range(10):
+            req = self.client.get("/api/projects/raclette", headers=wrong_auth)
+            self.assertStatus(401, req)
+        req = self.client.get("/api/projects/raclette", headers=wrong_auth)
+        self.assertStatus(429, req)
+        req = self.client.get(
+            "/api/projects/raclette", headers=self.get_auth("raclette")
+        )
+        self.assertStatus(429, req)
@@ -1,6 +1,9 @@
+from contextlib import contextmanager
+import datetime
 import os
 
 import pytest
+from sqlalchemy import event
 
 from ihatemoney import models
 from ihatemoney.utils import generate_password_hash
@@ -16,13 +19,13 @@ class BaseTestCase:
     PASSWORD_HASH_METHOD = "pbkdf2:sha1:1"
     PASSWORD_HASH_SALT_LENGTH = 1
 
-    def login(self, project, password=None, test_client=None):
+    def login(self, project, password=None, test_client=None, follow_redirects=False):
         password = password or project
 
         return self.client.post(
             "/authenticate",
             data=dict(id=project, password=password),
-            follow_redirects=True,
+            follow_redirects=follow_redirects,
         )
 
     def post_project(
@@ -59,7 +62,14 @@ class BaseTestCase:
         )
         assert ("/{id}/edit" in str(resp.response)) == (not success)
 
-    def create_project(self, id, default_currency="XXX", name=None, password=None):
+    def create_project(
+        self, id, default_currency="XXX", name=None, password=None, members=()
+    ):
+        """Create a project and its members directly in the database
+
+        Use it instead of post_project() when the project is only needed as
+        a fixture, to skip the HTTP requests.
+        """
         name = name or str(id)
         password = password or id
         project = models.Project(
@@ -70,11 +80,47 @@ class BaseTestCase:
             default_currency=default_currency,
         )
         models.db.session.add(project)
+        models.db.session.add_all(
+            models.Person(name=member, project=project) for member in members
+        )
+        models.db.session.commit()
+
+    def create_bill(
+        self, project_id, payer=1, owers=(1, 2), amount=10, what="fromage à raclette"
+    ):
+        """Create a bill directly in the database, paid by and for the given
+        member ids of the project"""
+        project = self.get_project(project_id)
+        bill = models.Bill(
+            amount=amount,
+            date=datetime.date(2011, 8, 10),
+            owers=[models.Person.query.get(ower, project) for ower in owers],
+            payer_id=payer,
+            project_default_currency=project.default_currency,
+            what=what,
+        )
+        models.db.session.add(bill)
         models.db.session.commit()
+        return bill
 
     def get_project(self, id) -> models.Project:
         return models.Project.query.get(id)
 
+    @contextmanager
+    def record_queries(self):
+        """Record the SQL statements sent to the database in a list"""
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = models.db.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
 
 class IhatemoneyTestCase(BaseTestCase):
     TESTING = True
@@ -3,10 +3,13 @@ from unittest.mock import MagicMock
 from flask import Flask
 from jinja2 import FileSystemBytecodeCache
 import pytest
+import sqlalchemy
+from sqlalchemy import text
 
 from ihatemoney.babel_utils import compile_catalogs
 from ihatemoney.currency_convertor import CurrencyConverter
 from ihatemoney.run import create_app, db
+from ihatemoney.utils import limiter
 
 
 @pytest.fixture(autouse=True, scope="session")
@@ -19,9 +22,13 @@ def jinja_cache_directory(tmp_path_factory):
     return tmp_path_factory.mktemp("cache")
 
 
-@pytest.fixture
+@pytest.fixture(scope="class")
 def app(request: pytest.FixtureRequest, jinja_cache_directory):
-    """Create the Flask app with database"""
+    """Create the Flask app with database, once for each test class
+
+    Running the migrations is the slowest part of the app creation, so the app
+    and its schema are shared by the tests of a class (see ``database``).
+    """
     app = create_app(request.cls)
 
     # Caches the jinja templates so they are compiled only once per test session
@@ -33,13 +40,58 @@ def app(request: pytest.FixtureRequest, jinja_cache_directory):
 
     yield app
 
-    # clean after testing
+    # clean after testing, so that the next class runs the migrations again
     db.session.remove()
     db.drop_all()
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+
+def delete_all_rows():
+    """Empty every table, keeping the migrated schema, and restart the ids
+
+    Textual statements are used so that SQLAlchemy-Continuum does not try to
+    version the deletion of the association table rows.
+    """
+    with db.engine.begin() as connection:
+        dialect = connection.dialect.name
+        quote = connection.dialect.identifier_preparer.format_table
+        tables = [quote(table) for table in reversed(db.metadata.sorted_tables)]
+        if dialect == "postgresql":
+            names = ", ".join(tables)
+            connection.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+            return
+
+        for table in tables:
+            connection.execute(text(f"DELETE FROM {table}"))
+        if dialect == "sqlite":
+            if sqlalchemy.inspect(connection).has_table("sqlite_sequence"):
+                connection.execute(text("DELETE FROM sqlite_sequence"))
+        elif dialect in ("mysql", "mariadb"):
+            for table in tables:
+                connection.execute(text(f"ALTER TABLE {table} AUTO_INCREMENT = 1"))
+
+
+@pytest.fixture
+def database(app: Flask):
+    """Give each test an empty database and the initial app configuration"""
+    config = dict(app.config)
+    config_root_path = app.config.root_path
+
+    yield db
+
+    # Restore the configuration first: tests may change the database URI
+    app.config.clear()
+    app.config.update(config)
+    app.config.root_path = config_root_path
+    db.session.remove()
+    with app.app_context():
+        delete_all_rows()
+    limiter.reset()
 
 
 @pytest.fixture
-def client(app: Flask, request: pytest.FixtureRequest):
+def client(app: Flask, database, request: pytest.FixtureRequest):
     client = app.test_client()
     request.cls.client = client
 
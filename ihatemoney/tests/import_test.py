@@ -321,6 +321,17 @@ class CommonTestCase(object):
                         list_json.sort()
                         assert list_project == list_json
 
+        def test_import_owers_not_queried_per_bill(self):
+            self.post_project("raclette")
+            self.login("raclette")
+
+            self.populate_data_with_currencies(["XXX", "XXX", "XXX"])
+            with self.record_queries() as statements:
+                self.import_project("raclette", self.generate_form_data(self.data))
+
+            assert len(self.get_project("raclette").get_bills().all()) == 3
+            assert not [s for s in statements if "person.name IN" in s]
+
         def test_import_wrong_data(self):
             self.post_project("raclette")
             self.login("raclette")
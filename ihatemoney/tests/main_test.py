@@ -3,7 +3,9 @@ import smtplib
 import socket
 from unittest.mock import MagicMock, patch
 
+import pytest
 from sqlalchemy import orm
+from sqlalchemy.exc import InvalidRequestError
 from werkzeug.security import check_password_hash
 
 from ihatemoney import models
@@ -170,6 +172,100 @@ class TestModels(IhatemoneyTestCase):
                 pay_each_expected = 10 / 3
                 assert bill.amount / weight == pay_each_expected
 
+    def test_balance_cache(self):
+        """Balances are computed once, and computed again after a write"""
+        self.create_project("raclette", members=("zorglub", "jeanne"))
+
+        project = self.get_project("raclette")
+        assert project.balance == {1: 0, 2: 0}
+        with self.record_queries() as statements:
+            assert project.balance == {1: 0, 2: 0}
+        assert statements == []
+
+        self.create_bill("raclette")
+        assert project.balance == {1: 5, 2: -5}
+
+        # Bulk updates skip the flush
+        models.Bill.query.update({models.Bill.converted_amount: 20})
+        assert project.balance == {1: 10, 2: -10}
+
+    def test_bill_repr(self):
+        """Displaying a bill does not load its payer or owers"""
+        self.create_project("raclette", members=("zorglub", "jeanne"))
+        self.create_bill("raclette")
+
+        models.db.session.expire_all()
+        bill = models.Bill.query.one()
+        with self.record_queries() as statements:
+            assert repr(bill) == "<Bill of 10.0 from #1 for ...>"
+        assert statements == []
+
+        bill.payer
+        bill.owers
+        assert repr(bill) == "<Bill of 10.0 from zorglub for zorglub, jeanne>"
+
+    def test_bill_repr_payer_not_loaded(self):
+        """Displaying a listed bill does not load its payer"""
+        self.create_project("raclette", members=("zorglub", "jeanne"))
+        self.create_bill("raclette", owers=(2,))
+
+        # As on the API bearer token path, the members are not loaded
+        models.db.session.expunge_all()
+        project = models.Project.query.get("raclette")
+        bill = project.get_bills().one()
+        with self.record_queries() as statements:
+            assert repr(bill) == "<Bill of 10.0 from #1 for jeanne>"
+        assert statements == []
+
+    def test_bills_no_lazy_queries(self):
+        """Listed bills cannot lazily query what was not loaded with them"""
+        self.create_project("raclette", members=("zorglub", "jeanne"))
+        self.create_bill("raclette", owers=(2,))
+
+        project = self.get_project("raclette")
+        models.db.session.expunge_all()
+        bill = project.get_bills().one()
+        assert [ower.name for ower in bill.owers] == ["jeanne"]
+        with pytest.raises(InvalidRequestError):
+            bill.payer
+
+        # Once in the session, the payer is found without any query
+        project = models.Project.query.get_with_members("raclette")
+        bill = project.get_bills().one()
+        assert bill.payer.name == "zorglub"
+
+    def test_bill_get_loads_payer(self):
+        """A single bill is loaded with its payer, even when the project
+        members are not in the session"""
+        self.create_project("raclette", members=("zorglub", "jeanne"))
+        self.create_bill("raclette", owers=(2,))
+
+        models.db.session.expunge_all()
+        project = models.Project.query.get("raclette")
+        with self.record_queries() as statements:
+            bill = models.Bill.query.get(project, 1)
+            assert bill.payer.name == "zorglub"
+            assert [ower.name for ower in bill.owers] == ["jeanne"]
+        assert len(statements) == 1
+
+    def test_person_get(self):
+        """Members already loaded are found without any query"""
+        self.post_project("raclette")
+        self.post_project("fondue")
+        self.client.post("/raclette/members/add", data={"name": "zorglub"})
+
+        # As in a new request
+        models.db.session.expunge_all()
+        raclette = models.Project.query.get_with_members("raclette")
+        fondue = models.Project.query.get_with_members("fondue")
+        with self.record_queries() as statements:
+            assert models.Person.query.get(1, raclette).name == "zorglub"
+        assert statements == []
+
+        # A member is only found in its own project
+        assert models.Person.query.get(1, fondue) is None
+        assert models.Person.query.get(42, raclette) is None
+
     def test_bill_pay_each(self):
         self.post_project("raclette")
 
@@ -9,6 +9,7 @@ import os
 import re
 import smtplib
 import socket
+import unicodedata
 
 from babel import Locale
 from babel.numbers import get_currency_name, get_currency_symbol
@@ -34,8 +35,6 @@ def slugify(value):
     and converts spaces to hyphens.
     """
     if isinstance(value, str):
-        import unicodedata
-
         value = unicodedata.normalize("NFKD", value)
     value = str(re.sub(r"[^\w\s-]", "", value).strip().lower())
     return re.sub(r"[-\s]+", "-", value)
@@ -244,8 +243,10 @@ class IhmJSONEncoder(JSONEncoder):
     Taken from the deprecated flask-rest package."""
 
     def default(self, o):
-        if hasattr(o, "_to_serialize"):
-            return o._to_serialize
+        # _to_serialize is a property building a new dict: only evaluate it once
+        serialized = getattr(o, "_to_serialize", None)
+        if serialized is not None:
+            return serialized
         elif hasattr(o, "isoformat"):
             return o.isoformat()
         else:
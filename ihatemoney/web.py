@@ -59,7 +59,7 @@ from ihatemoney.forms import (
     SettlementForm,
     get_billform_for,
 )
-from ihatemoney.history import get_history, get_history_queries, purge_history
+from ihatemoney.history import get_history, purge_history, purge_ip_addresses
 from ihatemoney.models import Bill, BillType, LoggingMode, Person, Project, db
 from ihatemoney.utils import (
     Redirect303,
@@ -159,7 +159,7 @@ def pull_project(endpoint, values):
     entered_project_id = values.pop("project_id", None)
     if entered_project_id:
         project_id = entered_project_id.lower()
-        project = Project.query.get(project_id)
+        project = Project.query.get_with_members(project_id)
         if not project:
             raise Redirect303(url_for(".create_project", project_id=project_id))
 
@@ -702,7 +702,7 @@ def add_member():
     return render_template("add_member.html", form=form)
 
 
-@main.route("/<project_id>/members/<member_id>/reactivate", methods=["POST"])
+@main.route("/<project_id>/members/<int:member_id>/reactivate", methods=["POST"])
 def reactivate(member_id):
     # Used for CSRF validation
     form = EmptyForm()
@@ -725,7 +725,7 @@ def reactivate(member_id):
     return redirect(url_for(".list_bills"))
 
 
-@main.route("/<project_id>/members/<member_id>/delete", methods=["POST"])
+@main.route("/<project_id>/members/<int:member_id>/delete", methods=["POST"])
 def remove_member(member_id):
     # Used for CSRF validation
     form = EmptyForm()
@@ -750,7 +750,7 @@ def remove_member(member_id):
     return redirect(url_for(".list_bills"))
 
 
-@main.route("/<project_id>/members/<member_id>/edit", methods=["POST", "GET"])
+@main.route("/<project_id>/members/<int:member_id>/edit", methods=["POST", "GET"])
 def edit_member(member_id):
     member = Person.query.get(member_id, g.project)
     if not member:
@@ -803,11 +803,10 @@ def delete_bill(bill_id):
         flash(format_form_errors(form, _("Error deleting bill")), category="danger")
         return redirect(url_for(".list_bills"))
 
-    bill = Bill.query.get(g.project, bill_id)
+    bill = Bill.query.delete(g.project, bill_id)
     if not bill:
         return redirect(url_for(".list_bills"))
 
-    db.session.delete(bill)
     db.session.commit()
     flash(_("The bill has been deleted"))
 
@@ -948,9 +947,7 @@ def strip_ip_addresses():
         )
         return redirect(url_for(".history"))
 
-    for query in get_history_queries(g.project):
-        for version_object in query.all():
-            version_object.transaction.remote_addr = None
+    purge_ip_addresses(g.project)
 
     db.session.commit()
     flash(_("Deleted recorded IP addresses in project history."))